@@ -4,6 +4,8 @@ from web3 import Web3
 from eth_account import Account
 from web3.middleware import ExtraDataToPOAMiddleware, LocalFilterMiddleware
 from apscheduler.schedulers.blocking import BlockingScheduler
+from holder_ledger import HolderLedger, get_deployment_block
+from tx_supervisor import TxSupervisor
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -80,6 +82,10 @@ storage_splitter_contract = w3.eth.contract(
 
 splitter_contracts = [compute_splitter_contract, storage_splitter_contract]
 
+tx_supervisor = TxSupervisor(w3, admin_account, ADMIN_PRIVATE_KEY, EXPLORER_URL)
+
+holder_ledger = HolderLedger(w3, glusd_contract, get_deployment_block(w3, GLUSD_ADDRESS_PATH))
+
 def take_snapshot():
     print("---")
     print(f"Checking if GLUSD snapshot is needed at {time.ctime()}...")
@@ -93,7 +99,6 @@ def take_snapshot():
 
             snapshot_tx = glusd_contract.functions.takeSnapshot().build_transaction({
                 'from': admin_account.address,
-                'nonce': w3.eth.get_transaction_count(admin_account.address),
             })
 
             try:
@@ -115,13 +120,12 @@ def take_snapshot():
                 'type': 2
             })
 
-            signed_snapshot_tx = w3.eth.account.sign_transaction(snapshot_tx, private_key=ADMIN_PRIVATE_KEY)
-            snapshot_tx_hash = w3.eth.send_raw_transaction(signed_snapshot_tx.raw_transaction)
-            print(f"Snapshot transaction sent: {EXPLORER_URL}{"0x"+snapshot_tx_hash.hex()}")
-            snapshot_receipt = w3.eth.wait_for_transaction_receipt(snapshot_tx_hash)
+            snapshot_receipt = tx_supervisor.send(snapshot_tx, label="Snapshot")
+            if snapshot_receipt is None:
+                return None
             print(f"Snapshot transaction receipt: {snapshot_receipt}")
 
-            return "0x" + snapshot_tx_hash.hex()
+            return "0x" + snapshot_receipt['transactionHash'].hex()
         else:
             print("Snapshot interval not reached yet. Skipping snapshot.")
             return None
@@ -151,7 +155,6 @@ def distribute_revenue():
             # Distribute fees
             distribute_tx = splitter_contract.functions.distribute().build_transaction({
                 'from': admin_account.address,  
-                'nonce': w3.eth.get_transaction_count(admin_account.address),
             })
 
             try:
@@ -182,10 +185,9 @@ def distribute_revenue():
                 'maxPriorityFeePerGas': priority_fee,
                 'type': 2
             })
-            signed_distribute_tx = w3.eth.account.sign_transaction(distribute_tx, private_key=ADMIN_PRIVATE_KEY)
-            distribute_tx_hash = w3.eth.send_raw_transaction(signed_distribute_tx.raw_transaction)
-            print(f"Distribute transaction sent: {EXPLORER_URL}{"0x"+distribute_tx_hash.hex()}")
-            distribute_receipt = w3.eth.wait_for_transaction_receipt(distribute_tx_hash)
+            distribute_receipt = tx_supervisor.send(distribute_tx, label="Distribute")
+            if distribute_receipt is None:
+                continue
             # print(f"Distribute transaction receipt: {distribute_receipt}")
 
             time.sleep(5)  # Wait for a few seconds to ensure the state is updated
@@ -193,15 +195,32 @@ def distribute_revenue():
             print(f"Revenue Splitter USDC Balance after distribution: {splitter_usdc_balance_after / 10 ** usdc_decimals}")
         else:
             print(f"Revenue Splitter ({splitter_contract.address}) USDC Balance below minimum threshold. Skipping distribution.")
-        
+
+def update_holder_ledger():
+    print("---")
+    print(f"Updating GLUSD holder ledger at {time.ctime()}...")
+    try:
+        new_transfers = holder_ledger.sync()
+        print(f"Applied {new_transfers} new GLUSD transfers up to block {holder_ledger.synced_block}")
+        holder_ledger.report(glusd_decimals=glusd_decimals, usdc_decimals=usdc_decimals)
+    except Exception as e:
+        print(f"Error updating holder ledger: {e}")
+
+def report_tx_supervisor():
+    print("---")
+    tx_supervisor.summary()
+
 scheduler = BlockingScheduler()
 scheduler.add_job(take_snapshot, 'interval', minutes=30)
 scheduler.add_job(distribute_revenue, 'interval', minutes=15)
+scheduler.add_job(update_holder_ledger, 'interval', minutes=15)
+scheduler.add_job(report_tx_supervisor, 'interval', hours=6)
 
 
 if __name__ == "__main__":
     take_snapshot()
     distribute_revenue()
+    update_holder_ledger()
     print("Starting background job scheduler...")
 
     scheduler.start()
\ No newline at end of file
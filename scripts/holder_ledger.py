@@ -0,0 +1,253 @@
+import os, json, time
+from bisect import bisect_right
+
+LOG_CHUNK_SIZE = int(os.getenv("LEDGER_LOG_CHUNK_SIZE", 2000))  # Max block range per eth_getLogs call
+CHECKPOINT_INTERVAL = int(os.getenv("LEDGER_CHECKPOINT_INTERVAL", 10000))  # Blocks between balance checkpoints
+RATE_SCALE = 10 ** 6  # GLUSD exchangeRate() is scaled by 1e6
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+
+def get_deployment_block(w3, deployment_path):
+    """Block number of the deployment transaction recorded in contracts/deployments/*.json"""
+    with open(deployment_path, 'r') as f:
+        tx_hash = json.load(f)['transactionHash']
+    return w3.eth.get_transaction_receipt(tx_hash)['blockNumber']
+
+
+class HolderLedger:
+    """
+    In-memory GLUSD holder ledger built incrementally from GLUSD contract events.
+
+    Balances are kept for the latest synced block. Every CHECKPOINT_INTERVAL blocks a copy of
+    the balances is stored, so a historical block is rebuilt by replaying transfers from the
+    nearest checkpoint instead of from the deployment block.
+
+    The exchange rate is derived the same way as GLUSD.exchangeRate(): vault USDC * 1e6 / supply.
+    Vault USDC is tracked from Mint, Redeem and FeesDeposited events, so USDC sent straight to
+    the vault without depositFees() is not counted.
+    """
+
+    def __init__(self, w3, glusd_contract, start_block, checkpoint_interval=CHECKPOINT_INTERVAL, chunk_size=LOG_CHUNK_SIZE):
+        self.w3 = w3
+        self.glusd_contract = glusd_contract
+        self.start_block = start_block
+        self.checkpoint_interval = checkpoint_interval
+        self.chunk_size = chunk_size
+
+        self.synced_block = start_block - 1
+        self.balances = {}
+
+        # Ordered transfer history: (block, log_index, from, to, value)
+        self.transfers = []
+        self.transfer_blocks = []
+
+        # Balance checkpoints taken after all transfers in checkpoint block were applied
+        self.checkpoint_blocks = [start_block - 1]
+        self.checkpoints = [{}]
+
+        # Vault history: (vault_usdc, supply) after every change, indexed by block
+        self.vault_usdc = 0
+        self.supply = 0
+        self.vault_blocks = []
+        self.vault_states = []
+
+        # All events are fetched with a single eth_getLogs per chunk and split by topic0
+        self.handlers = {
+            glusd_contract.events.Transfer.topic: (glusd_contract.events.Transfer(), self._apply_transfer),
+            glusd_contract.events.Mint.topic: (glusd_contract.events.Mint(), self._apply_mint),
+            glusd_contract.events.Redeem.topic: (glusd_contract.events.Redeem(), self._apply_redeem),
+            glusd_contract.events.FeesDeposited.topic: (glusd_contract.events.FeesDeposited(), self._apply_fees_deposited),
+        }
+
+    def sync(self, to_block=None):
+        """Fetch and apply GLUSD events up to to_block, capped at the chain head. Returns the number of new transfers"""
+        head = self.w3.eth.block_number
+        if to_block is None or to_block > head:
+            to_block = head
+
+        new_transfers = len(self.transfers)
+        while self.synced_block < to_block:
+            from_block = self.synced_block + 1
+            chunk_end = min(from_block + self.chunk_size - 1, to_block)
+
+            logs = self.w3.eth.get_logs({
+                'address': self.glusd_contract.address,
+                'fromBlock': from_block,
+                'toBlock': chunk_end,
+                'topics': [list(self.handlers)],
+            })
+
+            for log in sorted(logs, key=lambda l: (l['blockNumber'], l['logIndex'])):
+                event, handler = self.handlers[self.w3.to_hex(log['topics'][0])]
+                handler(event.process_log(log))
+
+            self.synced_block = chunk_end
+
+            if self.synced_block - self.checkpoint_blocks[-1] >= self.checkpoint_interval:
+                self.checkpoint_blocks.append(self.synced_block)
+                self.checkpoints.append(dict(self.balances))
+
+        return len(self.transfers) - new_transfers
+
+    def _apply_transfer(self, log):
+        args = log['args']
+        sender, recipient, value = args['from'], args['to'], args['value']
+
+        self.transfers.append((log['blockNumber'], log['logIndex'], sender, recipient, value))
+        self.transfer_blocks.append(log['blockNumber'])
+        self._move(self.balances, sender, recipient, value)
+
+        if sender == ZERO_ADDRESS:
+            self.supply += value
+            self._record_vault(log)
+        elif recipient == ZERO_ADDRESS:
+            self.supply -= value
+            self._record_vault(log)
+
+    def _apply_mint(self, log):
+        self.vault_usdc += log['args']['usdcDeposited'] - log['args']['fee']
+        self._record_vault(log)
+
+    def _apply_redeem(self, log):
+        self.vault_usdc -= log['args']['usdcReturned'] + log['args']['fee']
+        self._record_vault(log)
+
+    def _apply_fees_deposited(self, log):
+        self.vault_usdc += log['args']['amount']
+        self._record_vault(log)
+
+    def _record_vault(self, log):
+        self.vault_blocks.append(log['blockNumber'])
+        self.vault_states.append((self.vault_usdc, self.supply))
+
+    @staticmethod
+    def _move(balances, sender, recipient, value):
+        if sender != ZERO_ADDRESS:
+            remaining = balances.get(sender, 0) - value
+            if remaining:
+                balances[sender] = remaining
+            else:
+                balances.pop(sender, None)
+        if recipient != ZERO_ADDRESS:
+            balances[recipient] = balances.get(recipient, 0) + value
+
+    def _ensure_synced(self, block):
+        if block is None:
+            return self.synced_block
+        if block > self.synced_block:
+            self.sync(block)
+            if block > self.synced_block:
+                raise ValueError(f"Block {block} is past the chain head {self.synced_block}")
+        return block
+
+    def balances_at(self, block=None):
+        """Raw GLUSD balance per holder after all transfers in the given block, syncing up to it if needed"""
+        block = self._ensure_synced(block)
+        if block == self.synced_block:
+            return dict(self.balances)
+        if block < self.start_block:
+            return {}
+
+        idx = bisect_right(self.checkpoint_blocks, block) - 1
+        checkpoint_block = self.checkpoint_blocks[idx]
+        balances = dict(self.checkpoints[idx])
+
+        first = bisect_right(self.transfer_blocks, checkpoint_block)
+        last = bisect_right(self.transfer_blocks, block)
+        for _, _, sender, recipient, value in self.transfers[first:last]:
+            self._move(balances, sender, recipient, value)
+
+        return balances
+
+    def vault_status_at(self, block=None):
+        """(vault_usdc, supply) after all events in the given block"""
+        block = self._ensure_synced(block)
+        idx = bisect_right(self.vault_blocks, block) - 1
+        if idx < 0:
+            return 0, 0
+        return self.vault_states[idx]
+
+    def exchange_rate_at(self, block=None):
+        """Exchange rate (USDC per GLUSD, scaled by 1e6) at the given block, as GLUSD.exchangeRate() computes it"""
+        vault_usdc, supply = self.vault_status_at(block)
+        if supply == 0:
+            return RATE_SCALE  # 1:1 when no supply exists
+        return vault_usdc * RATE_SCALE // supply
+
+    def holders_at(self, block=None):
+        """List of (holder, glusd_raw, usdc_raw) sorted by balance, largest first"""
+        rate = self.exchange_rate_at(block)
+        balances = self.balances_at(block)
+        holders = [(holder, balance, balance * rate // RATE_SCALE) for holder, balance in balances.items() if balance > 0]
+        holders.sort(key=lambda h: h[1], reverse=True)
+        return holders
+
+    def top_holders(self, n=10, block=None):
+        return self.holders_at(block)[:n]
+
+    def concentration(self, block=None, top_n=10):
+        """Holder count, supply, top-N share and Herfindahl-Hirschman index (0-10000) at the given block"""
+        holders = self.holders_at(block)
+        supply = sum(balance for _, balance, _ in holders)
+        if supply == 0:
+            return {"holders": 0, "supply": 0, "usdc_value": 0, "top_share": 0.0, "hhi": 0.0}
+
+        top_share = sum(balance for _, balance, _ in holders[:top_n]) / supply
+        hhi = sum((balance / supply * 100) ** 2 for _, balance, _ in holders)
+
+        return {
+            "holders": len(holders),
+            "supply": supply,
+            "usdc_value": sum(usdc for _, _, usdc in holders),
+            "top_share": top_share,
+            "hhi": hhi,
+        }
+
+    def report(self, block=None, top_n=10, glusd_decimals=6, usdc_decimals=6):
+        if block is None:
+            block = self.synced_block
+
+        stats = self.concentration(block, top_n)
+        rate = self.exchange_rate_at(block)
+
+        print(f"GLUSD holders at block {block}: {stats['holders']}")
+        print(f"GLUSD supply: {stats['supply'] / 10 ** glusd_decimals}, exchange rate: {rate / RATE_SCALE}, "
+              f"USDC value: {stats['usdc_value'] / 10 ** usdc_decimals}")
+        print(f"Top {top_n} share: {stats['top_share'] * 100:.2f}%, HHI: {stats['hhi']:.0f}")
+        for holder, balance, usdc in self.top_holders(top_n, block):
+            print(f"  {holder}: {balance / 10 ** glusd_decimals} GLUSD ({usdc / 10 ** usdc_decimals} USDC)")
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    from web3 import Web3
+    from web3.middleware import ExtraDataToPOAMiddleware
+
+    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+    load_dotenv()
+
+    RPC_URL = os.getenv("RPC_URL")
+    LEDGER_BLOCK = os.getenv("LEDGER_BLOCK", None)
+
+    w3 = Web3(Web3.HTTPProvider(RPC_URL))
+    w3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
+
+    GLUSD_ABI_PATH = os.path.join(BASE_DIR, "..", "contracts", "out", "GLUSD.sol", "GLUSD.json")
+    with open(GLUSD_ABI_PATH, 'r') as f:
+        GLUSD_ABI = json.load(f)["abi"]
+
+    GLUSD_ADDRESS_PATH = os.path.join(BASE_DIR, "..", "contracts", "deployments", "GLUSD.json")
+    with open(GLUSD_ADDRESS_PATH, 'r') as f:
+        GLUSD_ADDRESS = w3.to_checksum_address(json.load(f)['deployedTo'])
+
+    glusd_contract = w3.eth.contract(address=GLUSD_ADDRESS, abi=GLUSD_ABI)
+    glusd_decimals = glusd_contract.functions.decimals().call()
+
+    ledger = HolderLedger(w3, glusd_contract, get_deployment_block(w3, GLUSD_ADDRESS_PATH))
+
+    start = time.time()
+    new_transfers = ledger.sync()
+    print(f"Synced {new_transfers} GLUSD transfers up to block {ledger.synced_block} in {time.time() - start:.1f}s")
+
+    ledger.report(int(LEDGER_BLOCK) if LEDGER_BLOCK else None, glusd_decimals=glusd_decimals)
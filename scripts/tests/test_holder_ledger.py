@@ -0,0 +1,189 @@
+import random
+import pytest
+from eth_abi import encode
+from web3 import Web3
+
+from holder_ledger import HolderLedger, RATE_SCALE, ZERO_ADDRESS
+
+GLUSD_ADDRESS = Web3.to_checksum_address("0x" + "d0" * 20)
+HOLDERS = [Web3.to_checksum_address("0x" + f"{i:02x}" * 20) for i in range(1, 6)]
+
+
+def _event(name, inputs):
+    return {"anonymous": False, "name": name, "type": "event",
+            "inputs": [{"indexed": indexed, "name": n, "type": t} for n, t, indexed in inputs]}
+
+
+GLUSD_EVENTS_ABI = [
+    _event("Transfer", [("from", "address", True), ("to", "address", True), ("value", "uint256", False)]),
+    _event("Mint", [("user", "address", True), ("usdcDeposited", "uint256", False), ("glusdMinted", "uint256", False), ("fee", "uint256", False)]),
+    _event("Redeem", [("user", "address", True), ("glusdBurned", "uint256", False), ("usdcReturned", "uint256", False), ("fee", "uint256", False)]),
+    _event("FeesDeposited", [("depositor", "address", True), ("amount", "uint256", False)]),
+]
+
+
+class FakeEth:
+    def __init__(self, logs, block_number):
+        self.logs = logs
+        self.block_number = block_number
+        self.get_logs_calls = 0
+
+    def get_logs(self, params):
+        self.get_logs_calls += 1
+        assert params['address'] == GLUSD_ADDRESS
+        topics = set(params['topics'][0])
+        return [l for l in self.logs
+                if params['fromBlock'] <= l['blockNumber'] <= params['toBlock'] and Web3.to_hex(l['topics'][0]) in topics]
+
+
+class FakeW3:
+    to_hex = staticmethod(Web3.to_hex)
+
+    def __init__(self, logs, block_number):
+        self.eth = FakeEth(logs, block_number)
+
+
+class LogBuilder:
+    def __init__(self):
+        self.contract = Web3().eth.contract(address=GLUSD_ADDRESS, abi=GLUSD_EVENTS_ABI)
+        self.logs = []
+
+    def _log(self, block, name, indexed, data_types, data):
+        topics = [bytes.fromhex(getattr(self.contract.events, name).topic[2:])]
+        topics += [bytes(12) + bytes.fromhex(a[2:]) for a in indexed]
+        self.logs.append({
+            'address': GLUSD_ADDRESS, 'topics': topics, 'data': encode(data_types, data),
+            'blockNumber': block, 'logIndex': len(self.logs), 'transactionIndex': 0,
+            'transactionHash': bytes(32), 'blockHash': bytes(32),
+        })
+
+    def transfer(self, block, sender, recipient, value):
+        self._log(block, "Transfer", [sender, recipient], ['uint256'], [value])
+
+    def mint(self, block, user, usdc, glusd, fee):
+        self.transfer(block, ZERO_ADDRESS, user, glusd)
+        self._log(block, "Mint", [user], ['uint256'] * 3, [usdc, glusd, fee])
+
+    def redeem(self, block, user, glusd, usdc_out, fee):
+        self.transfer(block, user, ZERO_ADDRESS, glusd)
+        self._log(block, "Redeem", [user], ['uint256'] * 3, [glusd, usdc_out, fee])
+
+    def fees_deposited(self, block, depositor, amount):
+        self._log(block, "FeesDeposited", [depositor], ['uint256'], [amount])
+
+
+def random_history(seed=0, blocks=900):
+    """Random mint/transfer/redeem/fee activity, plus a brute-force (balances, vault, supply) per block"""
+    rng = random.Random(seed)
+    builder = LogBuilder()
+    balances, vault, supply = {}, 0, 0
+    expected = {}
+
+    for block in range(100, 100 + blocks):
+        for _ in range(rng.randint(0, 2)):
+            action = rng.random()
+            holder = rng.choice(HOLDERS)
+            if action < 0.4 or supply == 0:
+                usdc = rng.randint(1, 1000) * 1000
+                fee = usdc // 200
+                glusd = usdc - fee if supply == 0 else (usdc - fee) * supply // vault
+                builder.mint(block, holder, usdc, glusd, fee)
+                balances[holder] = balances.get(holder, 0) + glusd
+                vault, supply = vault + usdc - fee, supply + glusd
+            elif action < 0.7 and balances.get(holder):
+                value = rng.randint(1, balances[holder])
+                recipient = rng.choice(HOLDERS)
+                builder.transfer(block, holder, recipient, value)
+                balances[holder] -= value
+                balances[recipient] = balances.get(recipient, 0) + value
+            elif action < 0.85 and balances.get(holder) and balances[holder] < supply:
+                glusd = rng.randint(1, balances[holder])
+                gross = glusd * vault // supply
+                fee = gross // 200
+                builder.redeem(block, holder, glusd, gross - fee, fee)
+                balances[holder] -= glusd
+                vault, supply = vault - gross, supply - glusd
+            else:
+                amount = rng.randint(1, 100) * 1000
+                builder.fees_deposited(block, HOLDERS[0], amount)
+                vault += amount
+        expected[block] = ({h: b for h, b in balances.items() if b}, vault, supply)
+
+    return builder, expected
+
+
+def make_ledger(builder, to_block, **kwargs):
+    w3 = FakeW3(builder.logs, to_block)
+    return HolderLedger(w3, builder.contract, 100, **kwargs)
+
+
+def test_checkpoint_replay_matches_brute_force():
+    builder, expected = random_history()
+    ledger = make_ledger(builder, 999, checkpoint_interval=50, chunk_size=13)
+    ledger.sync()
+
+    assert len(ledger.checkpoint_blocks) > 10
+    for block, (balances, vault, supply) in expected.items():
+        assert ledger.balances_at(block) == balances
+        assert ledger.vault_status_at(block) == (vault, supply)
+        assert ledger.exchange_rate_at(block) == (vault * RATE_SCALE // supply if supply else RATE_SCALE)
+
+
+def test_single_get_logs_call_per_chunk():
+    builder, _ = random_history(blocks=100)
+    ledger = make_ledger(builder, 199, chunk_size=10)
+    ledger.sync()
+
+    assert ledger.w3.eth.get_logs_calls == 10
+
+
+def test_query_past_synced_block_syncs_first():
+    builder, expected = random_history(blocks=200)
+    ledger = make_ledger(builder, 299, chunk_size=20)
+    ledger.sync(150)
+
+    assert ledger.balances_at(250) == expected[250][0]
+    assert ledger.synced_block == 250
+
+
+def test_query_past_head_raises_and_later_sync_catches_up():
+    builder, expected = random_history(blocks=200)
+    ledger = make_ledger(builder, 199, chunk_size=20)
+
+    with pytest.raises(ValueError):
+        ledger.balances_at(260)
+    assert ledger.synced_block == 199
+
+    ledger.w3.eth.block_number = 299
+    ledger.sync()
+    for block, (balances, vault, supply) in expected.items():
+        assert ledger.balances_at(block) == balances
+        assert ledger.vault_status_at(block) == (vault, supply)
+
+
+def test_rate_includes_fees_deposited_between_mints():
+    builder = LogBuilder()
+    builder.mint(100, HOLDERS[0], 1_000_000, 995_000, 5_000)
+    builder.fees_deposited(101, HOLDERS[1], 99_500)
+    ledger = make_ledger(builder, 101)
+    ledger.sync()
+
+    assert ledger.exchange_rate_at(100) == RATE_SCALE
+    assert ledger.exchange_rate_at(101) == 1_100_000
+    assert ledger.holders_at(101) == [(HOLDERS[0], 995_000, 1_094_500)]
+
+
+def test_concentration():
+    builder = LogBuilder()
+    builder.mint(100, HOLDERS[0], 603_015, 600_000, 3_015)
+    builder.mint(100, HOLDERS[1], 301_508, 300_000, 1_508)
+    builder.mint(100, HOLDERS[2], 100_503, 100_000, 503)
+    ledger = make_ledger(builder, 100)
+    ledger.sync()
+
+    stats = ledger.concentration(top_n=2)
+    assert stats['holders'] == 3
+    assert stats['supply'] == 1_000_000
+    assert stats['top_share'] == pytest.approx(0.9)
+    assert stats['hhi'] == pytest.approx(60 ** 2 + 30 ** 2 + 10 ** 2)
+    assert [h for h, _, _ in ledger.top_holders(2)] == HOLDERS[:2]
@@ -0,0 +1,215 @@
+import threading
+import time
+import pytest
+from web3.exceptions import TransactionNotFound
+
+import tx_supervisor
+from tx_supervisor import TxSupervisor
+
+GWEI = 10 ** 9
+BLOCK_TIME = 2
+
+
+class FakeEth:
+    """Chain and mempool for one account: blocks are only produced when a test calls mine() or add_block()"""
+
+    def __init__(self):
+        self.account = self
+        self.nonce = 0
+        self.base_fee = 30 * GWEI
+        self.block_fees = [self.base_fee]
+        self.sent = []
+        self.mempool = {}  # nonce -> tx currently pending for that nonce
+        self.receipts = {}
+
+    @property
+    def block_number(self):
+        return len(self.block_fees) - 1
+
+    def get_transaction_count(self, address, block_identifier='latest'):
+        if block_identifier == 'pending':
+            return max([self.nonce] + [n + 1 for n in self.mempool])
+        return self.nonce
+
+    def sign_transaction(self, tx, private_key):
+        return type("Signed", (), {"raw_transaction": dict(tx)})
+
+    def send_raw_transaction(self, tx):
+        if tx['nonce'] < self.nonce:
+            raise ValueError("nonce too low")
+        current = self.mempool.get(tx['nonce'])
+        if current and (tx['maxFeePerGas'] * 10 < current['maxFeePerGas'] * 11
+                        or tx['maxPriorityFeePerGas'] * 10 < current['maxPriorityFeePerGas'] * 11):
+            raise ValueError("replacement transaction underpriced")
+        self.mempool[tx['nonce']] = tx
+        self.sent.append(tx)
+        return bytes([len(self.sent)])
+
+    def get_transaction_receipt(self, tx_hash):
+        if tx_hash not in self.receipts:
+            raise TransactionNotFound(tx_hash)
+        return self.receipts[tx_hash]
+
+    def get_block(self, block):
+        number = self.block_number if block == "latest" else block
+        base_fee = self.base_fee if block == "latest" else self.block_fees[number]
+        return {"number": number, "baseFeePerGas": base_fee, "timestamp": number * BLOCK_TIME}
+
+    def add_block(self):
+        self.block_fees.append(self.base_fee)
+
+    def mine(self, index):
+        self.add_block()
+        tx = self.sent[index]
+        tx_hash = bytes([index + 1])
+        self.receipts[tx_hash] = {
+            "transactionHash": tx_hash, "blockNumber": self.block_number, "gasUsed": 100_000,
+            "effectiveGasPrice": min(tx['maxFeePerGas'], self.base_fee + tx['maxPriorityFeePerGas']),
+        }
+        self.mempool.pop(tx['nonce'], None)
+        self.nonce = max(self.nonce, tx['nonce'] + 1)
+
+
+class FakeW3:
+    def __init__(self):
+        self.eth = FakeEth()
+
+    def to_wei(self, value, unit):
+        return int(value * GWEI)
+
+    def from_wei(self, value, unit):
+        return value
+
+
+@pytest.fixture
+def supervisor(monkeypatch):
+    monkeypatch.setattr(tx_supervisor, "STUCK_TIMEOUT", 0)
+    monkeypatch.setattr(tx_supervisor, "POLL_INTERVAL", 0)
+    monkeypatch.setattr(tx_supervisor, "MAX_WAIT", 0.05)
+    return TxSupervisor(FakeW3(), type("Account", (), {"address": "0x1"}), "key")
+
+
+def tx(nonce=None):
+    return {"nonce": nonce, "maxFeePerGas": 32 * GWEI, "maxPriorityFeePerGas": 2 * GWEI, "gas": 100_000}
+
+
+def test_stale_caller_nonce_is_replaced(supervisor):
+    eth = supervisor.w3.eth
+    assert supervisor.send(tx(), "First") is None
+    eth.mine(len(eth.sent) - 1)
+
+    # Caller built its tx before the stuck nonce confirmed; the supervisor must not reuse it
+    sent = len(eth.sent)
+    supervisor.send(tx(nonce=0), "Second")
+    assert eth.sent[sent]['nonce'] == 1
+    assert supervisor.stats[0]['label'] == "First"
+
+
+def test_replacement_hash_confirms_with_base_fee_headroom(supervisor, monkeypatch):
+    eth = supervisor.w3.eth
+    monkeypatch.setattr(tx_supervisor, "MAX_BUMPS", 1)
+    assert supervisor.send(tx(), "Snapshot") is None
+    assert len(eth.sent) == 2
+    assert eth.sent[1]['maxPriorityFeePerGas'] == 2 * GWEI * 115 // 100
+    assert eth.sent[1]['maxFeePerGas'] == 2 * eth.base_fee + eth.sent[1]['maxPriorityFeePerGas']
+
+    eth.mine(1)
+    supervisor.resume_pending()
+    assert supervisor.pending == {}
+    entry = supervisor.stats[0]
+    assert entry['tx_hash'] == '0x02' and entry['replacements'] == 1
+    assert entry['bump_cost'] == entry['fee_paid'] - 32 * GWEI * 100_000
+
+
+def test_concurrent_sends_take_next_nonce(supervisor, monkeypatch):
+    eth = supervisor.w3.eth
+    monkeypatch.setattr(tx_supervisor, "STUCK_TIMEOUT", 3600)
+    monkeypatch.setattr(tx_supervisor, "POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(tx_supervisor, "MAX_WAIT", 5)
+    receipts = {}
+
+    def send(label):
+        receipts[label] = supervisor.send(tx(), label)
+
+    threads = [threading.Thread(target=send, args=(label,)) for label in ("Distribute", "Snapshot")]
+    for thread in threads:
+        thread.start()
+        while len(eth.sent) < threads.index(thread) + 1:
+            time.sleep(0.01)
+
+    assert [t['nonce'] for t in eth.sent] == [0, 1]
+    eth.mine(0)
+    eth.mine(1)
+    for thread in threads:
+        thread.join()
+    assert receipts["Distribute"] is not None and receipts["Snapshot"] is not None
+
+
+def test_abandoned_nonce_blocks_new_sends(supervisor):
+    eth = supervisor.w3.eth
+    supervisor.send(tx(), "Distribute")
+    sent = len(eth.sent)
+    assert supervisor.send(tx(), "Snapshot") is None
+    assert all(t['nonce'] == 0 for t in eth.sent[sent:])
+
+
+def test_fee_budget_exhaustion_sends_capped_replacement_once(supervisor, capsys):
+    eth = supervisor.w3.eth
+    eth.base_fee = 99 * GWEI
+    supervisor.send(tx(), "Distribute")
+
+    assert [t['maxFeePerGas'] for t in eth.sent] == [32 * GWEI, 100 * GWEI]
+    assert supervisor.pending[0]['bumps_exhausted']
+    assert capsys.readouterr().out.count("fee budget") == 1
+
+
+def test_latency_saved_estimated_from_base_fees(supervisor, monkeypatch):
+    eth = supervisor.w3.eth
+    monkeypatch.setattr(tx_supervisor, "MAX_BUMPS", 1)
+    eth.base_fee = 40 * GWEI  # Original maxFeePerGas of 32 gwei no longer fits
+    supervisor.send(tx(), "Distribute")
+    eth.mine(1)
+    supervisor.resume_pending()
+
+    supervisor.summary()
+    entry = supervisor.stats[0]
+    assert not entry['latency_resolved'] and entry['latency_saved'] is None
+
+    eth.add_block()
+    eth.base_fee = 25 * GWEI
+    eth.add_block()
+    eth.add_block()
+    supervisor.summary()
+    assert entry['latency_resolved']
+    assert entry['latency_saved'] == 2 * BLOCK_TIME
+
+
+def test_untracked_mempool_nonce_is_replaced(supervisor, monkeypatch):
+    eth = supervisor.w3.eth
+    monkeypatch.setattr(tx_supervisor, "STUCK_TIMEOUT", 3600)
+    eth.mempool[0] = {"nonce": 0, "maxFeePerGas": 40 * GWEI, "maxPriorityFeePerGas": 3 * GWEI}
+
+    supervisor.send(tx(), "Snapshot")
+    assert [t['nonce'] for t in eth.sent] == [0]
+    assert eth.sent[0]['maxPriorityFeePerGas'] * 10 >= 3 * GWEI * 11
+    assert 0 in supervisor.pending
+
+
+def test_untracked_nonce_over_budget_is_not_raised(supervisor):
+    eth = supervisor.w3.eth
+    eth.mempool[0] = {"nonce": 0, "maxFeePerGas": 200 * GWEI, "maxPriorityFeePerGas": 3 * GWEI}
+
+    assert supervisor.send(tx(), "Distribute") is None
+    assert eth.sent == [] and supervisor.pending == {}
+
+
+def test_nonce_consumed_by_untracked_tx(supervisor, monkeypatch):
+    eth = supervisor.w3.eth
+    monkeypatch.setattr(tx_supervisor, "STUCK_TIMEOUT", 3600)
+    supervisor.send(tx(), "Snapshot")
+    eth.nonce = 1  # Mined by someone else with the same key
+
+    supervisor.resume_pending()
+    assert 0 in supervisor.pending
+    supervisor.resume_pending()
+    assert supervisor.pending == {} and supervisor.stats == []
@@ -0,0 +1,297 @@
+import os, time, threading
+from web3.exceptions import TransactionNotFound
+
+STUCK_TIMEOUT = int(os.getenv("TX_STUCK_TIMEOUT", 60))  # Seconds without inclusion before bumping fees
+MAX_WAIT = int(os.getenv("TX_MAX_WAIT", 900))  # Seconds a send blocks on its own tx before returning to the job
+POLL_INTERVAL = float(os.getenv("TX_POLL_INTERVAL", 3))
+FEE_BUMP_PERCENT = int(os.getenv("TX_FEE_BUMP_PERCENT", 15))  # Nodes require >= 10% on both fee fields to replace
+MIN_REPLACEMENT_PERCENT = 10
+MAX_FEE_BUDGET_GWEI = float(os.getenv("TX_MAX_FEE_BUDGET_GWEI", 100))  # Ceiling for maxFeePerGas across bumps
+MAX_BUMPS = int(os.getenv("TX_MAX_BUMPS", 5))
+LATENCY_SCAN_BLOCKS = int(os.getenv("TX_LATENCY_SCAN_BLOCKS", 1800))  # Blocks searched when estimating latency saved
+
+
+class TxSupervisor:
+    """
+    Sends EIP-1559 transactions and supervises them until one of their hashes is mined.
+
+    If a transaction goes STUCK_TIMEOUT seconds without inclusion, the same nonce is re-signed
+    with maxFeePerGas/maxPriorityFeePerGas bumped by FEE_BUMP_PERCENT (and to at least twice the
+    current base fee), up to MAX_BUMPS times and never above MAX_FEE_BUDGET_GWEI. Every
+    replacement hash is tracked because any of them may be the one that confirms.
+
+    A send blocks for at most MAX_WAIT. Sends from other jobs meanwhile take the next nonce. A
+    nonce still unconfirmed after MAX_WAIT is abandoned by its job: later sends check and bump it
+    once, then return None without queuing a new tx behind it. Nonces pending in the mempool but
+    not tracked here (e.g. left by a previous process) are replaced by the next send at bumped fees.
+    """
+
+    def __init__(self, w3, account, private_key, explorer_url=""):
+        self.w3 = w3
+        self.account = account
+        self.private_key = private_key
+        self.explorer_url = explorer_url
+        self.max_fee_budget = w3.to_wei(MAX_FEE_BUDGET_GWEI, "gwei")
+
+        self.pending = {}  # nonce -> supervision state
+        self.stats = []  # One entry per confirmed nonce
+        self.lock = threading.Lock()  # Scheduler jobs share the admin nonce sequence
+
+    def send(self, tx, label="Transaction"):
+        """
+        Sign, send and supervise tx, overriding its nonce. Returns the receipt, or None if the tx
+        was not sent (an abandoned nonce is still pending, or the send failed) or is still pending
+        after MAX_WAIT.
+        """
+        with self.lock:
+            self.resume_pending()
+            abandoned = [s for s in self.pending.values() if s['abandoned']]
+            if abandoned:
+                blocking = ", ".join(f"{s['label']} (nonce {s['nonce']})" for s in abandoned)
+                print(f"Not sending {label} transaction, waiting on pending {blocking}.")
+                return None
+
+            nonce, untracked = self._next_nonce()
+            tx['nonce'] = nonce
+            try:
+                if untracked:
+                    print(f"Nonce {nonce} has an untracked pending transaction, replacing it with {label} at bumped fees.")
+                    tx, tx_hash = self._send_over_untracked(tx)
+                else:
+                    tx_hash = self._sign_and_send(tx)
+            except Exception as e:
+                print(f"{label} transaction not sent: {e}")
+                return None
+            print(f"{label} transaction sent: {self.explorer_url}{'0x'+tx_hash.hex()}")
+
+            now = time.time()
+            state = {
+                'label': label,
+                'nonce': nonce,
+                'tx': dict(tx),
+                'original_max_fee': tx['maxFeePerGas'],
+                'original_priority_fee': tx['maxPriorityFeePerGas'],
+                'hashes': [tx_hash],
+                'sent_at': now,
+                'sent_block': self.w3.eth.block_number,
+                'last_sent_at': now,
+                'first_bump_at': None,
+                'bumps_exhausted': False,
+                'nonce_consumed_checks': 0,
+                'abandoned': False,
+                'done': False,
+                'receipt': None,
+            }
+            self.pending[nonce] = state
+
+        return self._supervise(state)
+
+    def _next_nonce(self):
+        """Lowest nonce not supervised here, and whether an untracked tx already occupies it in the mempool"""
+        nonce = self.w3.eth.get_transaction_count(self.account.address, 'latest')
+        while nonce in self.pending:
+            nonce += 1
+        return nonce, nonce < self.w3.eth.get_transaction_count(self.account.address, 'pending')
+
+    def _send_over_untracked(self, tx):
+        """Replace an untracked mempool tx whose fees are unknown, bumping until the node accepts it"""
+        base_fee = self._base_fee()
+        for _ in range(MAX_BUMPS):
+            max_fee, priority_fee, _ = self._bumped_fees(tx, base_fee)
+            if max_fee is None:
+                break
+            tx = dict(tx, maxFeePerGas=max_fee, maxPriorityFeePerGas=priority_fee)
+            try:
+                return tx, self._sign_and_send(tx)
+            except Exception as e:
+                if "underpriced" not in str(e).lower():
+                    raise
+        raise ValueError(f"could not replace nonce {tx['nonce']} within fee budget of {MAX_FEE_BUDGET_GWEI} gwei")
+
+    def resume_pending(self):
+        """Single non-blocking pass over nonces left in flight: record receipts and bump stuck ones"""
+        for nonce in sorted(self.pending):
+            self._check(self.pending[nonce])
+
+    def _sign_and_send(self, tx):
+        signed_tx = self.w3.eth.account.sign_transaction(tx, private_key=self.private_key)
+        return self.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+
+    def _find_receipt(self, hashes):
+        for tx_hash in hashes:
+            try:
+                return self.w3.eth.get_transaction_receipt(tx_hash)
+            except TransactionNotFound:
+                continue
+        return None
+
+    def _supervise(self, state):
+        deadline = time.time() + MAX_WAIT
+
+        while time.time() < deadline:
+            with self.lock:
+                if not state['done']:
+                    self._check(state)
+            if state['done']:
+                return state['receipt']
+            time.sleep(POLL_INTERVAL)
+
+        with self.lock:
+            state['abandoned'] = not state['done']
+        if state['done']:
+            return state['receipt']
+        print(f"{state['label']} transaction (nonce {state['nonce']}) still pending after {MAX_WAIT}s, "
+              f"later sends will wait for it. Hashes: {['0x' + h.hex() for h in state['hashes']]}")
+        return None
+
+    def _check(self, state):
+        """One supervision step for a pending nonce. Caller must hold self.lock"""
+        nonce = state['nonce']
+
+        receipt = self._find_receipt(state['hashes'])
+        if receipt is not None:
+            self._finish(state, receipt)
+            self._record(state, receipt)
+            return
+
+        # Nonce consumed by a transaction we are not tracking; give our receipts one more poll to show up
+        if self.w3.eth.get_transaction_count(self.account.address) > nonce:
+            state['nonce_consumed_checks'] += 1
+            if state['nonce_consumed_checks'] > 1:
+                print(f"{state['label']} nonce {nonce} was consumed by an untracked transaction.")
+                self._finish(state, None)
+            return
+
+        if not state['bumps_exhausted'] and time.time() - state['last_sent_at'] >= STUCK_TIMEOUT:
+            self._bump(state)
+
+    def _finish(self, state, receipt):
+        state['done'] = True
+        state['receipt'] = receipt
+        self.pending.pop(state['nonce'], None)
+
+    def _base_fee(self):
+        latest_block = self.w3.eth.get_block("latest")
+        return latest_block.get("baseFeePerGas", self.w3.to_wei(15, "gwei"))
+
+    def _bumped_fees(self, tx, base_fee):
+        """
+        Replacement fees for tx: FEE_BUMP_PERCENT above the previous ones and at least
+        2 * base_fee + priority so one more base fee rise does not leave it stuck again.
+        Returns (max_fee, priority_fee, capped); fees are None if the budget leaves no valid replacement.
+        """
+        priority_fee = tx['maxPriorityFeePerGas'] * (100 + FEE_BUMP_PERCENT) // 100
+        max_fee = max(tx['maxFeePerGas'] * (100 + FEE_BUMP_PERCENT) // 100, 2 * base_fee + priority_fee)
+        if max_fee <= self.max_fee_budget:
+            return max_fee, priority_fee, False
+
+        # Cap at the budget, if the node would still accept it as a replacement
+        max_fee = self.max_fee_budget
+        priority_fee = min(priority_fee, max_fee)
+        if (max_fee * 100 < tx['maxFeePerGas'] * (100 + MIN_REPLACEMENT_PERCENT)
+                or priority_fee * 100 < tx['maxPriorityFeePerGas'] * (100 + MIN_REPLACEMENT_PERCENT)):
+            return None, None, True
+        return max_fee, priority_fee, True
+
+    def _bump(self, state):
+        nonce, tx = state['nonce'], state['tx']
+        if len(state['hashes']) - 1 >= MAX_BUMPS:
+            state['bumps_exhausted'] = True
+            print(f"{state['label']} nonce {nonce} reached {MAX_BUMPS} replacements, not bumping further.")
+            return
+
+        max_fee, priority_fee, capped = self._bumped_fees(tx, self._base_fee())
+        if capped:
+            state['bumps_exhausted'] = True
+            if max_fee is None:
+                print(f"{state['label']} nonce {nonce} reached fee budget of {MAX_FEE_BUDGET_GWEI} gwei, not bumping further.")
+                return
+            print(f"{state['label']} nonce {nonce} capped at fee budget of {MAX_FEE_BUDGET_GWEI} gwei, sending final replacement.")
+
+        replacement = dict(tx, maxFeePerGas=max_fee, maxPriorityFeePerGas=priority_fee)
+        now = time.time()
+        try:
+            tx_hash = self._sign_and_send(replacement)
+        except Exception as e:
+            # Usually "nonce too low" because an earlier hash was just mined; retry after another STUCK_TIMEOUT
+            print(f"Replacement for {state['label']} nonce {nonce} not sent: {e}")
+            state['last_sent_at'] = now
+            return
+
+        if state['first_bump_at'] is None:
+            state['first_bump_at'] = now
+        state['tx'] = replacement
+        state['hashes'].append(tx_hash)
+        state['last_sent_at'] = now
+
+        print(f"{state['label']} nonce {nonce} stuck for {STUCK_TIMEOUT}s, replaced with "
+              f"maxFeePerGas {self.w3.from_wei(max_fee, 'gwei')} gwei, "
+              f"maxPriorityFeePerGas {self.w3.from_wei(priority_fee, 'gwei')} gwei: "
+              f"{self.explorer_url}{'0x'+tx_hash.hex()}")
+
+    def _record(self, state, receipt):
+        confirmed_at = time.time()
+        gas_used = receipt['gasUsed']
+        paid = receipt['effectiveGasPrice'] * gas_used
+        bumped = state['first_bump_at'] is not None
+
+        # What the original fees would have paid in the inclusion block
+        block_base_fee = self.w3.eth.get_block(receipt['blockNumber']).get("baseFeePerGas", 0)
+        original_price = min(state['original_max_fee'], block_base_fee + state['original_priority_fee'])
+        bump_cost = paid - original_price * gas_used if bumped else 0
+
+        entry = {
+            'label': state['label'],
+            'tx_hash': '0x' + receipt['transactionHash'].hex(),
+            'replacements': len(state['hashes']) - 1,
+            'latency': confirmed_at - state['sent_at'],
+            'latency_after_bump': confirmed_at - state['first_bump_at'] if bumped else 0.0,
+            'sent_block': state['sent_block'],
+            'inclusion_block': receipt['blockNumber'],
+            'original_max_fee': state['original_max_fee'],
+            # Estimated lazily in summary(); None while unknown or if the original would not fit in the scan window
+            'latency_saved': None if bumped else 0.0,
+            'latency_resolved': not bumped,
+            'fee_paid': paid,
+            'bump_cost': bump_cost,
+        }
+        self.stats.append(entry)
+
+        print(f"{entry['label']} transaction confirmed in block {receipt['blockNumber']} after {entry['latency']:.0f}s "
+              f"({entry['replacements']} replacements): {self.explorer_url}{entry['tx_hash']}")
+        if bumped:
+            print(f"Fee bump cost: {self.w3.from_wei(bump_cost, 'ether')} AVAX")
+
+    def _estimate_latency_saved(self, entry):
+        """
+        The original would have been included in the first block after it was sent whose base fee
+        fits under its maxFeePerGas; latency saved is that block's time minus the actual inclusion time.
+        """
+        scan_end = entry['sent_block'] + LATENCY_SCAN_BLOCKS
+        last = min(self.w3.eth.block_number, scan_end)
+        for number in range(entry.get('scan_from', entry['sent_block'] + 1), last + 1):
+            block = self.w3.eth.get_block(number)
+            if block.get("baseFeePerGas", 0) <= entry['original_max_fee']:
+                inclusion_time = self.w3.eth.get_block(entry['inclusion_block'])['timestamp']
+                entry['latency_saved'] = block['timestamp'] - inclusion_time
+                entry['latency_resolved'] = True
+                return
+        entry['scan_from'] = last + 1
+        entry['latency_resolved'] = last == scan_end
+
+    def summary(self):
+        bumped = [s for s in self.stats if s['replacements']]
+        for entry in bumped:
+            if not entry['latency_resolved']:
+                self._estimate_latency_saved(entry)
+
+        total_cost = sum(s['bump_cost'] for s in bumped)
+        print(f"Supervised {len(self.stats)} transactions, {len(bumped)} fee-bumped, "
+              f"total bump cost {self.w3.from_wei(total_cost, 'ether')} AVAX, {len(self.pending)} still pending")
+        if bumped:
+            estimated = [s['latency_saved'] for s in bumped if s['latency_resolved'] and s['latency_saved'] is not None]
+            beyond_window = sum(1 for s in bumped if s['latency_resolved'] and s['latency_saved'] is None)
+            waiting = sum(1 for s in bumped if not s['latency_resolved'])
+            print(f"Latency saved: {sum(estimated):.0f}s over {len(estimated)} bumped transactions, "
+                  f"{beyond_window} where the original fees did not fit within {LATENCY_SCAN_BLOCKS} blocks, "
+                  f"{waiting} still being estimated")